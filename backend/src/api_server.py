@@ -3,36 +3,113 @@ PyBot - API Server
 Flask + WebSocket server that connects all components
 """
 
-from flask import Flask, jsonify, request
+# Monkey-patch before anything imports requests/socket machinery
+import eventlet
+eventlet.monkey_patch()
+
+from flask import Flask, request
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
-import threading
-import time
+from flask_socketio import SocketIO, emit, join_room
+import msgspec
+import orjson
+import os
+import queue
 from datetime import datetime
 
 from price_monitor import PriceMonitor
 from dex_handler import DEXHandler
 from arbitrage_detector import ArbitrageDetector
-from historical_data import HistoricalDataManager
-from trade_simulator import TradeSimulator
+from historical_data import HistoricalDataManager, PRICE_COLUMNS
+from trade_simulator import TradeSimulator, _iso
 from profit_calculator import ProfitCalculator
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Initialize all components
+# orjson options shared by REST responses and WebSocket payloads
+_ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+class OrjsonSocketIOJSON:
+    """Drop-in json module for Flask-SocketIO backed by orjson's C encoder"""
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj, option=_ORJSON_OPTS,
+                            default=msgspec.to_builtins).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+# REDIS_URL enables cross-worker emits under multi-worker gunicorn
+socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins="*",
+                    json=OrjsonSocketIOJSON,
+                    message_queue=os.getenv('REDIS_URL'))
+
+def oj(data, status=200):
+    """Build a JSON response with orjson instead of Flask's jsonify
+
+    msgspec structs (e.g. ArbResult) serialize via the to_builtins hook.
+    """
+    return app.response_class(
+        orjson.dumps(data, option=_ORJSON_OPTS, default=msgspec.to_builtins),
+        status=status,
+        mimetype='application/json'
+    )
+
+# Request schemas - msgspec decodes and validates in one C-level pass
+class DetectRequest(msgspec.Struct):
+    trade_amounts: list[float] = msgspec.field(
+        default_factory=lambda: [0.5, 1.0, 5.0])
+
+class SimulateRequest(msgspec.Struct):
+    buy_dex: str
+    sell_dex: str
+    buy_price: float
+    sell_price: float
+    trade_amount_eth: float
+
+class ProfitRequest(msgspec.Struct):
+    buy_price: float
+    sell_price: float
+    trade_amount_eth: float
+    buy_dex: str
+    sell_dex: str
+    include_slippage: bool = True
+
+def decode_body(schema):
+    """Decode and validate the request body against a msgspec schema"""
+    return msgspec.json.decode(request.get_data(), type=schema)
+
+# Initialize all components - one DEXHandler shared by every consumer so
+# they reuse a single provider, connection pool and price cache
 print("Initializing PyBot API Server...")
 price_monitor = PriceMonitor()
 dex_handler = DEXHandler()
-arbitrage_detector = ArbitrageDetector(min_profit_usd=5, min_profit_pct=0.1)
-historical_manager = HistoricalDataManager()
+arbitrage_detector = ArbitrageDetector(min_profit_usd=5, min_profit_pct=0.1,
+                                       dex_handler=dex_handler)
+historical_manager = HistoricalDataManager(dex_handler=dex_handler)
 trade_simulator = TradeSimulator()
 profit_calculator = ProfitCalculator()
 
+# Reactive reserve updates when an ALCHEMY_WS_URL is configured
+dex_handler.start_sync_listener()
+
 # Global state
 is_monitoring = False
-monitor_thread = None
+
+# Bounded hand-off between the monitor and the DB writer so a slow
+# SQLite fsync can never stall a WebSocket emit
+db_queue = queue.Queue(maxsize=64)
+db_writer_started = False
+
+def db_writer():
+    """Background task that drains price snapshots into SQLite"""
+    while True:
+        snapshot = db_queue.get()
+        try:
+            historical_manager.log_prices_from_snapshot(snapshot)
+        except Exception as e:
+            print(f"Error writing price snapshot: {e}")
 
 print("All components initialized!")
 
@@ -41,7 +118,7 @@ print("All components initialized!")
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return oj({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'components': {
@@ -57,7 +134,7 @@ def health_check():
 def get_current_prices():
     """Get current prices from all DEXs"""
     prices = dex_handler.get_all_prices()
-    return jsonify({
+    return oj({
         'success': True,
         'data': prices,
         'timestamp': datetime.now().isoformat()
@@ -67,7 +144,7 @@ def get_current_prices():
 def get_price_comparison():
     """Get price comparison across DEXs"""
     comparison = dex_handler.compare_prices()
-    return jsonify({
+    return oj({
         'success': True,
         'data': comparison,
         'timestamp': datetime.now().isoformat()
@@ -76,12 +153,14 @@ def get_price_comparison():
 @app.route('/api/arbitrage/detect', methods=['POST'])
 def detect_arbitrage():
     """Detect arbitrage opportunities"""
-    data = request.json or {}
-    trade_amounts = data.get('trade_amounts', [0.5, 1.0, 5.0])
-    
-    opportunities = arbitrage_detector.detect_opportunities(trade_amounts)
+    try:
+        req = decode_body(DetectRequest) if request.get_data() else DetectRequest()
+    except msgspec.DecodeError as e:
+        return oj({'success': False, 'error': str(e)}, 400)
+
+    opportunities = arbitrage_detector.detect_opportunities(req.trade_amounts)
     
-    return jsonify({
+    return oj({
         'success': True,
         'data': {
             'opportunities': opportunities,
@@ -95,15 +174,22 @@ def get_historical_prices():
     """Get historical price data"""
     dex_name = request.args.get('dex_name')
     hours = int(request.args.get('hours', 24))
-    
-    prices = historical_manager.get_recent_prices(dex_name=dex_name, hours=hours)
-    
-    return jsonify({
+
+    # Raw row tuples serialize straight to JSON arrays - no dict per row
+    rows = historical_manager.get_recent_prices(
+        dex_name=dex_name, hours=hours, as_rows=True
+    )
+
+    body = orjson.dumps({
         'success': True,
-        'data': prices,
-        'count': len(prices),
+        'columns': PRICE_COLUMNS,
+        'data': rows,
+        'count': len(rows),
         'timestamp': datetime.now().isoformat()
-    })
+    }, option=_ORJSON_OPTS)
+
+    return app.response_class(body, mimetype='application/json',
+                              direct_passthrough=True)
 
 @app.route('/api/historical/stats', methods=['GET'])
 def get_price_stats():
@@ -113,7 +199,7 @@ def get_price_stats():
     
     stats = historical_manager.get_price_stats(dex_name, hours)
     
-    return jsonify({
+    return oj({
         'success': True,
         'data': stats,
         'timestamp': datetime.now().isoformat()
@@ -122,15 +208,17 @@ def get_price_stats():
 @app.route('/api/trade/simulate', methods=['POST'])
 def simulate_trade():
     """Simulate a trade"""
-    data = request.json
-    
-    if not data:
-        return jsonify({'success': False, 'error': 'No data provided'}), 400
-    
-    # Simulate the trade
-    result = trade_simulator.simulate_trade(data)
-    
-    return jsonify({
+    try:
+        req = decode_body(SimulateRequest)
+    except msgspec.DecodeError as e:
+        return oj({'success': False, 'error': str(e)}, 400)
+
+    # Simulate the trade; records carry raw time_ns() timestamps, so
+    # format a copy at this boundary to keep the ISO response contract
+    result = trade_simulator.simulate_trade(msgspec.to_builtins(req))
+    result = {**result, 'timestamp': _iso(result['timestamp'])}
+
+    return oj({
         'success': True,
         'data': result,
         'timestamp': datetime.now().isoformat()
@@ -141,7 +229,7 @@ def get_trade_statistics():
     """Get trading statistics"""
     stats = trade_simulator.get_statistics()
     
-    return jsonify({
+    return oj({
         'success': True,
         'data': stats,
         'timestamp': datetime.now().isoformat()
@@ -153,7 +241,7 @@ def get_trade_history():
     limit = int(request.args.get('limit', 10))
     trades = trade_simulator.get_recent_trades(limit)
     
-    return jsonify({
+    return oj({
         'success': True,
         'data': trades,
         'count': len(trades),
@@ -163,21 +251,21 @@ def get_trade_history():
 @app.route('/api/profit/calculate', methods=['POST'])
 def calculate_profit():
     """Calculate profit for given parameters"""
-    data = request.json
-    
-    if not data:
-        return jsonify({'success': False, 'error': 'No data provided'}), 400
-    
+    try:
+        req = decode_body(ProfitRequest)
+    except msgspec.DecodeError as e:
+        return oj({'success': False, 'error': str(e)}, 400)
+
     result = profit_calculator.calculate_net_profit(
-        buy_price=data['buy_price'],
-        sell_price=data['sell_price'],
-        trade_amount_eth=data['trade_amount_eth'],
-        buy_dex=data['buy_dex'],
-        sell_dex=data['sell_dex'],
-        include_slippage=data.get('include_slippage', True)
+        buy_price=req.buy_price,
+        sell_price=req.sell_price,
+        trade_amount_eth=req.trade_amount_eth,
+        buy_dex=req.buy_dex,
+        sell_dex=req.sell_dex,
+        include_slippage=req.include_slippage
     )
     
-    return jsonify({
+    return oj({
         'success': True,
         'data': result,
         'timestamp': datetime.now().isoformat()
@@ -185,10 +273,15 @@ def calculate_profit():
 
 # ==================== WEBSOCKET EVENTS ====================
 
+def _price_room_occupied():
+    """True when at least one client has joined the prices room"""
+    return bool(socketio.server.manager.rooms.get('/', {}).get('prices'))
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     print(' Client connected')
+    join_room('prices')
     emit('connection_response', {
         'status': 'connected',
         'message': 'Connected to PyBot API',
@@ -203,25 +296,25 @@ def handle_disconnect():
 @socketio.on('start_monitoring')
 def handle_start_monitoring(data):
     """Start real-time monitoring"""
-    global is_monitoring, monitor_thread
-    
+    global is_monitoring
+
     if is_monitoring:
         emit('monitoring_response', {
             'status': 'already_running',
             'message': 'Monitoring already active'
         })
         return
-    
+
+    global db_writer_started
     interval = data.get('interval', 5)
     is_monitoring = True
-    
-    monitor_thread = threading.Thread(
-        target=background_monitor,
-        args=(interval,),
-        daemon=True
-    )
-    monitor_thread.start()
-    
+
+    if not db_writer_started:
+        db_writer_started = True
+        socketio.start_background_task(db_writer)
+
+    socketio.start_background_task(background_monitor, interval)
+
     emit('monitoring_response', {
         'status': 'started',
         'message': f'Monitoring started (interval: {interval}s)',
@@ -249,33 +342,39 @@ def background_monitor(interval):
     
     while is_monitoring:
         try:
-            # Get current prices
+            # Fetch once per tick, fan the snapshot out to every consumer
             prices = dex_handler.get_all_prices()
+            comparison = dex_handler.compute_comparison(prices)
+            opportunities = arbitrage_detector.detect_opportunities_from_comparison(
+                comparison, [0.5, 1.0, 5.0]
+            )
+            # Hand the snapshot to the DB writer; drop it if the queue is
+            # backed up rather than blocking the emit below
+            try:
+                db_queue.put_nowait(prices)
+            except queue.Full:
+                pass
+
+            # One ISO timestamp per tick, shared by every emit
+            tick_iso = datetime.now().isoformat()
+
+            # Broadcast to the prices room; the packet is encoded once
+            # and shared across recipients. Skip entirely when empty.
+            if _price_room_occupied():
+                socketio.emit('price_update', {
+                    'prices': prices,
+                    'comparison': comparison,
+                    'timestamp': tick_iso
+                }, to='prices')
+
+                if opportunities:
+                    socketio.emit('arbitrage_alert', {
+                        'opportunities': opportunities,
+                        'count': len(opportunities),
+                        'timestamp': tick_iso
+                    }, to='prices')
             
-            # Get comparison
-            comparison = dex_handler.compare_prices()
-            
-            # Detect arbitrage
-            opportunities = arbitrage_detector.detect_opportunities([0.5, 1.0, 5.0])
-            
-            # Log to database
-            historical_manager.log_prices()
-            
-            # Emit updates via WebSocket
-            socketio.emit('price_update', {
-                'prices': prices,
-                'comparison': comparison,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            if opportunities:
-                socketio.emit('arbitrage_alert', {
-                    'opportunities': opportunities,
-                    'count': len(opportunities),
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            time.sleep(interval)
+            socketio.sleep(interval)
             
         except Exception as e:
             print(f"Error in background monitor: {e}")
@@ -283,7 +382,7 @@ def background_monitor(interval):
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             })
-            time.sleep(interval)
+            socketio.sleep(interval)
     
     print(" Background monitoring stopped")
 
@@ -315,4 +414,7 @@ if __name__ == '__main__':
     print("=" * 70)
     print("\n Starting server...\n")
     
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Dev server only; deploy with gunicorn via wsgi.py. FLASK_DEBUG=1
+    # re-enables the reloader/debugger locally.
+    socketio.run(app, host='0.0.0.0', port=5000,
+                 debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -4,6 +4,8 @@ Identifies profitable arbitrage opportunities between DEXs
 """
 
 import os
+import msgspec
+import numpy as np
 from web3 import Web3
 from dotenv import load_dotenv
 from datetime import datetime
@@ -11,23 +13,51 @@ from dex_handler import DEXHandler
 
 load_dotenv()
 
+class ArbResult(msgspec.Struct):
+    """Arbitrage calculation result
+
+    Fixed-layout struct: construction is a C-level fixed-offset store and
+    serialization skips the per-key hashing a 16-key dict pays.
+    """
+    timestamp: str
+    trade_amount_eth: float
+    buy_dex: str
+    sell_dex: str
+    buy_price: float
+    sell_price: float
+    buy_cost: float
+    sell_revenue: float
+    gross_profit: float
+    gas_cost: float
+    net_profit: float
+    profit_pct: float
+    net_profit_pct: float
+    is_profitable: bool
+    price_spread: float
+    price_spread_pct: float
+
 class ArbitrageDetector:
-    def __init__(self, min_profit_usd=5, min_profit_pct=0.1):
+    def __init__(self, min_profit_usd=5, min_profit_pct=0.1, dex_handler=None):
         """
         Initialize arbitrage detector
-        
+
         Args:
             min_profit_usd: Minimum profit in USD to consider (after gas)
             min_profit_pct: Minimum profit percentage to consider
+            dex_handler: Shared DEXHandler; a private one is created if None
         """
-        self.dex_handler = DEXHandler()
+        self.dex_handler = dex_handler or DEXHandler()
         self.min_profit_usd = min_profit_usd
         self.min_profit_pct = min_profit_pct
         
         # Estimated gas costs (in USD) - rough estimates
         self.gas_cost_swap = 15  # ~$15 per swap on mainnet
         self.gas_cost_total = self.gas_cost_swap * 2  # Buy + Sell
-        
+
+        # Single-entry memo: (block, amounts) -> opportunities, so a burst
+        # of /api/arbitrage/detect calls within one block computes once
+        self._memo = {}
+
         print(f"   ArbitrageDetector initialized")
         print(f"   Min Profit: ${min_profit_usd} ({min_profit_pct}%)")
         print(f"   Est. Gas Cost: ${self.gas_cost_total}")
@@ -38,52 +68,65 @@ class ArbitrageDetector:
         
         Args:
             trade_amount_eth: Amount of ETH to trade (default 1.0)
-        
+
         Returns:
-            Dictionary with arbitrage details or None
+            ArbResult with arbitrage details or None
         """
         comparison = self.dex_handler.compare_prices()
-        
+
+        return self.calculate_arbitrage_from_comparison(comparison, trade_amount_eth)
+
+    def calculate_arbitrage_from_comparison(self, comparison, trade_amount_eth=1.0):
+        """
+        Calculate arbitrage opportunity from a precomputed comparison
+
+        Args:
+            comparison: Dict from DEXHandler.compare_prices()
+            trade_amount_eth: Amount of ETH to trade (default 1.0)
+
+        Returns:
+            ArbResult with arbitrage details or None
+        """
         if not comparison:
             return None
-        
+
         buy_dex = comparison['lowest']['dex']
         sell_dex = comparison['highest']['dex']
         buy_price = comparison['lowest']['price']
         sell_price = comparison['highest']['price']
-        
+
         # Calculate costs and profits
         buy_cost = trade_amount_eth * buy_price
         sell_revenue = trade_amount_eth * sell_price
-        
+
         gross_profit = sell_revenue - buy_cost
         net_profit = gross_profit - self.gas_cost_total
-        
+
         profit_pct = (gross_profit / buy_cost) * 100
         net_profit_pct = (net_profit / buy_cost) * 100
-        
+
         # Determine if profitable
-        is_profitable = (net_profit >= self.min_profit_usd and 
+        is_profitable = (net_profit >= self.min_profit_usd and
                         profit_pct >= self.min_profit_pct)
-        
-        return {
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
-            'trade_amount_eth': trade_amount_eth,
-            'buy_dex': buy_dex,
-            'sell_dex': sell_dex,
-            'buy_price': buy_price,
-            'sell_price': sell_price,
-            'buy_cost': round(buy_cost, 2),
-            'sell_revenue': round(sell_revenue, 2),
-            'gross_profit': round(gross_profit, 2),
-            'gas_cost': self.gas_cost_total,
-            'net_profit': round(net_profit, 2),
-            'profit_pct': round(profit_pct, 3),
-            'net_profit_pct': round(net_profit_pct, 3),
-            'is_profitable': is_profitable,
-            'price_spread': comparison['difference'],
-            'price_spread_pct': comparison['difference_pct']
-        }
+
+        return ArbResult(
+            timestamp=datetime.now().strftime('%H:%M:%S'),
+            trade_amount_eth=trade_amount_eth,
+            buy_dex=buy_dex,
+            sell_dex=sell_dex,
+            buy_price=buy_price,
+            sell_price=sell_price,
+            buy_cost=round(buy_cost, 2),
+            sell_revenue=round(sell_revenue, 2),
+            gross_profit=round(gross_profit, 2),
+            gas_cost=self.gas_cost_total,
+            net_profit=round(net_profit, 2),
+            profit_pct=round(profit_pct, 3),
+            net_profit_pct=round(net_profit_pct, 3),
+            is_profitable=is_profitable,
+            price_spread=comparison['difference'],
+            price_spread_pct=comparison['difference_pct']
+        )
     
     def detect_opportunities(self, trade_amounts=[0.1, 0.5, 1.0, 5.0]):
         """
@@ -95,14 +138,79 @@ class ArbitrageDetector:
         Returns:
             List of profitable opportunities
         """
+        block = self.dex_handler.get_block_number()
+        key = (block, tuple(trade_amounts))
+
+        if block is not None and key in self._memo:
+            return self._memo[key]
+
+        comparison = self.dex_handler.compare_prices()
+        opportunities = self.detect_opportunities_from_comparison(
+            comparison, trade_amounts
+        )
+
+        if block is not None:
+            # Keep only the current block's entry
+            self._memo = {key: opportunities}
+
+        return opportunities
+
+    def detect_opportunities_from_comparison(self, comparison,
+                                             trade_amounts=[0.1, 0.5, 1.0, 5.0]):
+        """
+        Detect opportunities from a precomputed comparison (no RPC calls)
+
+        Args:
+            comparison: Dict from DEXHandler.compare_prices()
+            trade_amounts: List of ETH amounts to test
+
+        Returns:
+            List of profitable opportunities
+        """
+        if not comparison:
+            return []
+
+        buy_dex = comparison['lowest']['dex']
+        sell_dex = comparison['highest']['dex']
+        buy_price = comparison['lowest']['price']
+        sell_price = comparison['highest']['price']
+
+        # One vectorized pass over all amounts instead of per-amount calls
+        amounts = np.asarray(trade_amounts, dtype=np.float64)
+        buy_cost = amounts * buy_price
+        sell_revenue = amounts * sell_price
+        gross_profit = sell_revenue - buy_cost
+        net_profit = gross_profit - self.gas_cost_total
+        profit_pct = (gross_profit / buy_cost) * 100
+        net_profit_pct = (net_profit / buy_cost) * 100
+
+        profitable = (net_profit >= self.min_profit_usd) & \
+                     (profit_pct >= self.min_profit_pct)
+
+        # Only build result structs for the profitable amounts
+        timestamp = datetime.now().strftime('%H:%M:%S')
         opportunities = []
-        
-        for amount in trade_amounts:
-            arb = self.calculate_arbitrage(trade_amount_eth=amount)
-            
-            if arb and arb['is_profitable']:
-                opportunities.append(arb)
-        
+
+        for i in np.flatnonzero(profitable):
+            opportunities.append(ArbResult(
+                timestamp=timestamp,
+                trade_amount_eth=float(amounts[i]),
+                buy_dex=buy_dex,
+                sell_dex=sell_dex,
+                buy_price=buy_price,
+                sell_price=sell_price,
+                buy_cost=round(float(buy_cost[i]), 2),
+                sell_revenue=round(float(sell_revenue[i]), 2),
+                gross_profit=round(float(gross_profit[i]), 2),
+                gas_cost=self.gas_cost_total,
+                net_profit=round(float(net_profit[i]), 2),
+                profit_pct=round(float(profit_pct[i]), 3),
+                net_profit_pct=round(float(net_profit_pct[i]), 3),
+                is_profitable=True,
+                price_spread=comparison['difference'],
+                price_spread_pct=comparison['difference_pct']
+            ))
+
         return opportunities
     
     def monitor_arbitrage(self, interval=10, trade_amounts=[0.5, 1.0, 5.0]):
@@ -130,21 +238,21 @@ class ArbitrageDetector:
                     print(f" ARBITRAGE OPPORTUNITY DETECTED! \n")
                     
                     for opp in opportunities:
-                        print(f"Trade Size: {opp['trade_amount_eth']} ETH")
-                        print(f"  Buy  {opp['buy_dex']:12} @ ${opp['buy_price']:,.2f} = ${opp['buy_cost']:,.2f}")
-                        print(f"  Sell {opp['sell_dex']:12} @ ${opp['sell_price']:,.2f} = ${opp['sell_revenue']:,.2f}")
-                        print(f"  Gross Profit: ${opp['gross_profit']} ({opp['profit_pct']}%)")
-                        print(f"  Gas Cost: -${opp['gas_cost']}")
-                        print(f"  NET PROFIT: ${opp['net_profit']} ({opp['net_profit_pct']}%)")
+                        print(f"Trade Size: {opp.trade_amount_eth} ETH")
+                        print(f"  Buy  {opp.buy_dex:12} @ ${opp.buy_price:,.2f} = ${opp.buy_cost:,.2f}")
+                        print(f"  Sell {opp.sell_dex:12} @ ${opp.sell_price:,.2f} = ${opp.sell_revenue:,.2f}")
+                        print(f"  Gross Profit: ${opp.gross_profit} ({opp.profit_pct}%)")
+                        print(f"  Gas Cost: -${opp.gas_cost}")
+                        print(f"  NET PROFIT: ${opp.net_profit} ({opp.net_profit_pct}%)")
                         print()
                 else:
                     # Still show current prices even without opportunity
                     arb = self.calculate_arbitrage(trade_amount_eth=1.0)
                     if arb:
-                        print(f"Current Spread: ${arb['price_spread']} ({arb['price_spread_pct']}%)")
-                        print(f"  {arb['buy_dex']}: ${arb['buy_price']:,.2f}")
-                        print(f"  {arb['sell_dex']}: ${arb['sell_price']:,.2f}")
-                        print(f"  Net Profit (1 ETH): ${arb['net_profit']} - NOT PROFITABLE")
+                        print(f"Current Spread: ${arb.price_spread} ({arb.price_spread_pct}%)")
+                        print(f"  {arb.buy_dex}: ${arb.buy_price:,.2f}")
+                        print(f"  {arb.sell_dex}: ${arb.sell_price:,.2f}")
+                        print(f"  Net Profit (1 ETH): ${arb.net_profit} - NOT PROFITABLE")
                 
                 print(f"\nTotal Opportunities Found: {opportunities_found}")
                 print("-" * 80)
@@ -0,0 +1,39 @@
+"""
+PyBot - AOT Kernel Builder
+Compiles the profit kernels ahead of time with numba.pycc
+
+Run once per deploy (or whenever the kernels change):
+
+    python build_kernels.py
+
+This produces a profit_kernels extension module next to the sources.
+When present it is picked up by profit_calculator at import, removing
+the first-call JIT warm-up entirely; when absent the @njit versions are
+used as before, so the build step is optional.
+"""
+
+import os
+
+# Make profit_calculator skip any previously built extension so we
+# always export the @njit sources, not the prior AOT output
+os.environ['PYBOT_DISABLE_AOT_KERNELS'] = '1'
+
+from numba.pycc import CC
+
+from profit_calculator import _net_profit_jit, _profit_sweep_jit
+
+cc = CC('profit_kernels')
+
+cc.export(
+    'net_profit',
+    'UniTuple(f8, 8)(f8, f8, f8, f8, f8, f8, f8)'
+)(_net_profit_jit.py_func)
+
+cc.export(
+    'profit_sweep',
+    'f8[:](f8[:], f8, f8, f8, f8, f8, f8)'
+)(_profit_sweep_jit.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
+    print("✅ profit_kernels compiled")
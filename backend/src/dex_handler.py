@@ -4,20 +4,49 @@ Fetches prices from multiple DEXs (Uniswap V2 & SushiSwap)
 """
 
 import os
+import asyncio
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from web3 import Web3
+from eth_abi import decode as abi_decode
 from dotenv import load_dotenv
 from datetime import datetime
+from utils import ttl_cache
 
 load_dotenv()
 
+# getReserves() function selector - constant for every UniswapV2-style pair
+GET_RESERVES_SELECTOR = '0x0902f1ac'
+
+# keccak256("Sync(uint112,uint112)") - emitted on every pair state change
+SYNC_TOPIC = '0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1'
+
+# Decimal scales, computed once (USDC = 6 decimals, WETH = 18 decimals)
+_USDC_SCALE = 10**6
+_WETH_SCALE = 10**18
+_PRICE_SCALE = 10**12  # 18 - 6: converts the raw reserve ratio to USDC/ETH
+
 class DEXHandler:
     def __init__(self):
-        # Connect to Ethereum
-        self.w3 = Web3(Web3.HTTPProvider(os.getenv('ALCHEMY_URL')))
-        
+        # Connect to Ethereum over one keep-alive session so each RPC
+        # reuses the TLS connection instead of paying a fresh handshake
+        self.rpc_url = os.getenv('ALCHEMY_URL')
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4,
+                                                pool_maxsize=8)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        self.w3 = Web3(Web3.HTTPProvider(
+            self.rpc_url,
+            request_kwargs={'timeout': 10},
+            session=self._session
+        ))
+
         if not self.w3.is_connected():
             raise Exception("Failed to connect to Ethereum")
-        
+
         # DEX Pool Addresses - ETH/USDC pairs
         self.pools = {
             'Uniswap V2': '0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc',
@@ -59,57 +88,220 @@ class DEXHandler:
             }
         ]
         
+        # Checksum addresses once - reused by every RPC (batched or single)
+        self._pool_addresses = {
+            name: Web3.to_checksum_address(addr)
+            for name, addr in self.pools.items()
+        }
+
+        # Contract objects and bound getReserves functions, built once;
+        # per-call construction re-parses the ABI and re-hashes the address
+        self._contracts = {
+            name: self.w3.eth.contract(address=addr, abi=self.pool_abi)
+            for name, addr in self._pool_addresses.items()
+        }
+        self._reserves_fn = {
+            name: contract.functions.getReserves()
+            for name, contract in self._contracts.items()
+        }
+
+        # Pool for the non-batched fallback path, so per-DEX RPCs overlap
+        self._executor = ThreadPoolExecutor(max_workers=max(4, len(self.pools)))
+
+        # Reactive reserve cache fed by the Sync-event listener (optional,
+        # needs ALCHEMY_WS_URL); when live, polling turns into dict reads
+        self.ws_url = os.getenv('ALCHEMY_WS_URL')
+        self._latest = {}
+        self._sync_thread = None
+
         print(" DEXHandler initialized - Tracking Uniswap V2 & SushiSwap")
-    
+
+    def start_sync_listener(self):
+        """Start the Sync-event subscription (requires ALCHEMY_WS_URL)
+
+        Returns True when the listener is running; False when no WebSocket
+        endpoint is configured and the handler stays on polled getReserves.
+        """
+        if not self.ws_url:
+            print(" ALCHEMY_WS_URL not set - staying on polled getReserves")
+            return False
+
+        if self._sync_thread and self._sync_thread.is_alive():
+            return True
+
+        self._sync_thread = threading.Thread(
+            target=lambda: asyncio.run(self._listen_sync_events()),
+            daemon=True
+        )
+        self._sync_thread.start()
+        return True
+
+    async def _listen_sync_events(self):
+        """Subscribe to pair Sync logs and keep the reserve cache current"""
+        from web3 import AsyncWeb3
+        from web3.providers import WebsocketProviderV2
+
+        address_to_dex = {
+            addr.lower(): name for name, addr in self._pool_addresses.items()
+        }
+
+        try:
+            async with AsyncWeb3.persistent_websocket(
+                WebsocketProviderV2(self.ws_url)
+            ) as w3:
+                await w3.eth.subscribe('logs', {
+                    'address': list(self._pool_addresses.values()),
+                    'topics': [SYNC_TOPIC]
+                })
+                print(" Sync listener live - reserves update on pair events")
+
+                async for message in w3.ws.process_subscriptions():
+                    log = message['result']
+                    dex_name = address_to_dex.get(log['address'].lower())
+                    if not dex_name:
+                        continue
+
+                    data = log['data']
+                    if isinstance(data, str):
+                        data = bytes.fromhex(data[2:])
+
+                    reserves = abi_decode(['uint112', 'uint112'], data)
+                    self._latest[dex_name] = self._price_from_reserves(
+                        dex_name, reserves
+                    )
+        except Exception as e:
+            print(f" Sync listener stopped ({e}) - reverting to polling")
+            self._latest = {}
+
+    def _fetch_all_reserves(self):
+        """Fetch getReserves for every pool in one batched JSON-RPC POST
+
+        Returns:
+            Dict of dex_name -> (reserve0, reserve1, blockTimestampLast)
+        """
+        names = list(self._pool_addresses.keys())
+        batch = [
+            {
+                'jsonrpc': '2.0',
+                'id': i,
+                'method': 'eth_call',
+                'params': [
+                    {'to': self._pool_addresses[name], 'data': GET_RESERVES_SELECTOR},
+                    'latest'
+                ]
+            }
+            for i, name in enumerate(names)
+        ]
+
+        response = self._session.post(self.rpc_url, json=batch, timeout=10)
+        response.raise_for_status()
+
+        reserves = {}
+        for item in response.json():
+            result = item.get('result')
+            if not result:
+                continue
+            name = names[item['id']]
+            reserves[name] = abi_decode(
+                ['uint112', 'uint112', 'uint32'],
+                bytes.fromhex(result[2:])
+            )
+
+        return reserves
+
     def get_price_from_dex(self, dex_name):
         """Fetch price from a specific DEX"""
         try:
-            pool_address = self.pools[dex_name]
-            contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(pool_address),
-                abi=self.pool_abi
-            )
-            
-            # Get reserves
-            reserves = contract.functions.getReserves().call()
-            
-            # USDC = 6 decimals, WETH = 18 decimals
-            reserve_usdc = reserves[0] / 10**6
-            reserve_weth = reserves[1] / 10**18
-            
-            # Calculate price
-            eth_price = reserve_usdc / reserve_weth
-            
-            return {
-                'dex': dex_name,
-                'price': round(eth_price, 2),
-                'reserve_usdc': round(reserve_usdc, 2),
-                'reserve_weth': round(reserve_weth, 4),
-                'timestamp': datetime.now().strftime('%H:%M:%S')
-            }
-            
+            # Get reserves via the cached bound function
+            reserves = self._reserves_fn[dex_name].call()
+
+            return self._price_from_reserves(dex_name, reserves)
+
         except Exception as e:
             print(f" Error fetching from {dex_name}: {e}")
             return None
-    
+
+    def _price_from_reserves(self, dex_name, reserves, timestamp=None):
+        """Build the price dict for a pool from its raw reserves"""
+        r0, r1 = reserves[0], reserves[1]
+
+        # Single fused computation on the raw integers; the cached scale
+        # constants avoid recomputing 10**18 (and the two intermediate
+        # float divisions) on every call
+        eth_price = (r0 * _PRICE_SCALE) / r1
+
+        return {
+            'dex': dex_name,
+            'price': round(eth_price, 2),
+            'reserve_usdc': round(r0 / _USDC_SCALE, 2),
+            'reserve_weth': round(r1 / _WETH_SCALE, 4),
+            'timestamp': timestamp or datetime.now().strftime('%H:%M:%S')
+        }
+
+    @ttl_cache(seconds=2.0)
+    def get_block_number(self):
+        """Current block number, cached briefly (used as a memo key)"""
+        try:
+            return self.w3.eth.block_number
+        except Exception as e:
+            print(f" Error fetching block number: {e}")
+            return None
+
+    @ttl_cache(seconds=1.5)
     def get_all_prices(self):
-        """Fetch prices from all DEXs"""
+        """Fetch prices from all DEXs in one batched RPC round-trip
+
+        Results are shared for a short TTL so a burst of API requests
+        (or the per-amount loop in the detector) costs one RPC round-trip.
+        When the Sync-event listener is live the snapshot is served straight
+        from its cache with no RPC at all.
+        """
+        if (self._sync_thread and self._sync_thread.is_alive()
+                and len(self._latest) == len(self.pools)):
+            return dict(self._latest)
+
+        try:
+            reserves = self._fetch_all_reserves()
+            # strftime is slow; format once per snapshot, not per pool
+            timestamp = datetime.now().strftime('%H:%M:%S')
+            return {
+                dex_name: self._price_from_reserves(dex_name, res, timestamp)
+                for dex_name, res in reserves.items()
+            }
+        except Exception as e:
+            print(f" Batched fetch failed, falling back to per-DEX calls: {e}")
+
+        # Fallback: fan the per-DEX calls out so wall time is max(RTT),
+        # not sum(RTT)
+        futures = {
+            dex_name: self._executor.submit(self.get_price_from_dex, dex_name)
+            for dex_name in self.pools.keys()
+        }
+
         prices = {}
-        
-        for dex_name in self.pools.keys():
-            price_data = self.get_price_from_dex(dex_name)
+        for dex_name, future in futures.items():
+            price_data = future.result()
             if price_data:
                 prices[dex_name] = price_data
-        
+
         return prices
     
-    def compare_prices(self):
-        """Compare prices across DEXs and find differences"""
-        prices = self.get_all_prices()
-        
-        if len(prices) < 2:
+    def compare_prices(self, prices=None):
+        """Compare prices across DEXs and find differences
+
+        Args:
+            prices: Optional snapshot from get_all_prices(); fetched when None
+        """
+        if prices is None:
+            prices = self.get_all_prices()
+
+        return self.compute_comparison(prices)
+
+    def compute_comparison(self, prices):
+        """Build the comparison dict from an already-fetched price snapshot"""
+        if not prices or len(prices) < 2:
             return None
-        
+
         # Extract just the price values
         dex_prices = {dex: data['price'] for dex, data in prices.items()}
         
@@ -130,7 +322,8 @@ class DEXHandler:
             'lowest': {'dex': lowest_dex, 'price': lowest_price},
             'difference': round(price_diff, 2),
             'difference_pct': round(price_diff_pct, 3),
-            'timestamp': datetime.now().strftime('%H:%M:%S')
+            # Reuse the snapshot's timestamp rather than re-running strftime
+            'timestamp': next(iter(prices.values()))['timestamp']
         }
     
     def monitor_comparison(self, interval=5):
@@ -5,27 +5,46 @@ Stores and retrieves price history from SQLite database
 
 import sqlite3
 import os
+import threading
 from datetime import datetime, timedelta
 from dex_handler import DEXHandler
 import time
 
+# Column order of rows returned by get_recent_prices(as_rows=True)
+PRICE_COLUMNS = ('timestamp', 'dex_name', 'eth_price',
+                 'reserve_usdc', 'reserve_weth')
+
 class HistoricalDataManager:
-    def __init__(self, db_path='../data/pybot.db'):
-        """Initialize database connection"""
+    def __init__(self, db_path='../data/pybot.db', dex_handler=None):
+        """Initialize database connection
+
+        Args:
+            db_path: SQLite database location
+            dex_handler: Shared DEXHandler; a private one is created if None
+        """
         db_dir = os.path.dirname(db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
-        
+
         self.db_path = db_path
-        self.dex_handler = DEXHandler()
+        self.dex_handler = dex_handler or DEXHandler()
+
+        # One long-lived connection (WAL mode) shared across all methods;
+        # the lock serializes access from the monitor and API threads
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
         self._init_database()
         print(f"✅ HistoricalDataManager initialized")
-    
+
     def _init_database(self):
-        """Create tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        """Create tables and tune the connection for frequent small writes"""
+        cursor = self.conn.cursor()
+
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS price_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -51,101 +70,120 @@ class HistoricalDataManager:
                 profit_pct REAL NOT NULL
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-    
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_ph_dex_ts
+            ON price_history(dex_name, timestamp DESC)
+        ''')
+
+        self.conn.commit()
+
     def log_prices(self):
         """Fetch and log current prices from all DEXs"""
         prices = self.dex_handler.get_all_prices()
+        return self.log_prices_from_snapshot(prices)
+
+    def log_prices_from_snapshot(self, prices):
+        """Log an already-fetched price snapshot (no RPC calls)"""
         if not prices:
             return False
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for dex_name, data in prices.items():
-            cursor.execute('''
+
+        rows = [
+            (dex_name, data['price'], data['reserve_usdc'], data['reserve_weth'])
+            for dex_name, data in prices.items()
+        ]
+
+        with self._lock:
+            self.conn.executemany('''
                 INSERT INTO price_history (dex_name, eth_price, reserve_usdc, reserve_weth)
                 VALUES (?, ?, ?, ?)
-            ''', (dex_name, data['price'], data['reserve_usdc'], data['reserve_weth']))
-        
-        conn.commit()
-        conn.close()
+            ''', rows)
+            self.conn.commit()
         return True
-    
+
     def log_arbitrage(self, arb_data):
         """Log an arbitrage opportunity"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        with self._lock:
+            self.conn.execute('''
             INSERT INTO arbitrage_history 
             (buy_dex, sell_dex, buy_price, sell_price, trade_amount_eth, 
              gross_profit, net_profit, profit_pct)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            arb_data['buy_dex'], arb_data['sell_dex'],
-            arb_data['buy_price'], arb_data['sell_price'],
-            arb_data['trade_amount_eth'],
-            arb_data['gross_profit'], arb_data['net_profit'],
-            arb_data['profit_pct']
-        ))
-        
-        conn.commit()
-        conn.close()
+                arb_data['buy_dex'], arb_data['sell_dex'],
+                arb_data['buy_price'], arb_data['sell_price'],
+                arb_data['trade_amount_eth'],
+                arb_data['gross_profit'], arb_data['net_profit'],
+                arb_data['profit_pct']
+            ))
+            self.conn.commit()
+
+    def get_recent_prices(self, dex_name=None, hours=24, limit=1000,
+                          as_rows=False):
+        """Get recent price history
+
+        Args:
+            as_rows: When True, return raw row tuples (PRICE_COLUMNS order)
+                     instead of building a dict per row
+        """
+        time_threshold = datetime.now() - timedelta(hours=hours)
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            if not as_rows:
+                # dict(sqlite3.Row) builds the keyed dicts in C instead of
+                # a five-key Python comprehension per row
+                cursor.row_factory = sqlite3.Row
+
+            if dex_name:
+                cursor.execute('''
+                    SELECT timestamp, dex_name, eth_price, reserve_usdc, reserve_weth
+                    FROM price_history
+                    WHERE dex_name = ? AND timestamp >= ?
+                    ORDER BY timestamp DESC LIMIT ?
+                ''', (dex_name, time_threshold, limit))
+            else:
+                cursor.execute('''
+                    SELECT timestamp, dex_name, eth_price, reserve_usdc, reserve_weth
+                    FROM price_history
+                    WHERE timestamp >= ?
+                    ORDER BY timestamp DESC LIMIT ?
+                ''', (time_threshold, limit))
+
+            rows = cursor.fetchall()
+
+        if as_rows:
+            return rows
+
+        return [dict(row) for row in rows]
     
-    def get_recent_prices(self, dex_name=None, hours=24, limit=1000):
-        """Get recent price history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def get_price_stats(self, dex_name, hours=24):
+        """Get price statistics for a DEX (aggregated inside SQLite)"""
         time_threshold = datetime.now() - timedelta(hours=hours)
-        
-        if dex_name:
-            cursor.execute('''
-                SELECT timestamp, dex_name, eth_price, reserve_usdc, reserve_weth
+
+        with self._lock:
+            low, high, avg, count = self.conn.execute('''
+                SELECT MIN(eth_price), MAX(eth_price), AVG(eth_price), COUNT(*)
                 FROM price_history
                 WHERE dex_name = ? AND timestamp >= ?
-                ORDER BY timestamp DESC LIMIT ?
-            ''', (dex_name, time_threshold, limit))
-        else:
-            cursor.execute('''
-                SELECT timestamp, dex_name, eth_price, reserve_usdc, reserve_weth
-                FROM price_history
-                WHERE timestamp >= ?
-                ORDER BY timestamp DESC LIMIT ?
-            ''', (time_threshold, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'timestamp': row[0],
-                'dex_name': row[1],
-                'eth_price': row[2],
-                'reserve_usdc': row[3],
-                'reserve_weth': row[4]
-            }
-            for row in rows
-        ]
-    
-    def get_price_stats(self, dex_name, hours=24):
-        """Get price statistics for a DEX"""
-        prices = self.get_recent_prices(dex_name=dex_name, hours=hours)
-        if not prices:
-            return None
-        
-        price_values = [p['eth_price'] for p in prices]
-        
+            ''', (dex_name, time_threshold)).fetchone()
+
+            if not count:
+                return None
+
+            current = self.conn.execute('''
+                SELECT eth_price FROM price_history
+                WHERE dex_name = ?
+                ORDER BY timestamp DESC LIMIT 1
+            ''', (dex_name,)).fetchone()[0]
+
         return {
             'dex_name': dex_name,
-            'current': price_values[0],
-            'high': max(price_values),
-            'low': min(price_values),
-            'avg': sum(price_values) / len(price_values),
-            'data_points': len(price_values)
+            'current': current,
+            'high': high,
+            'low': low,
+            'avg': avg,
+            'data_points': count
         }
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Connects to Uniswap V2 and fetches real-time ETH/USDC prices
 """
 
 import os
+import requests
 from web3 import Web3
 from dotenv import load_dotenv
 import time
@@ -12,93 +13,223 @@ from datetime import datetime
 # Load environment variables
 load_dotenv()
 
+# getReserves() selector - constant for every UniswapV2-style pair
+GET_RESERVES_SELECTOR = '0x0902f1ac'
+
+# Price scale folding the decimal adjustment (USDC 6, WETH 18) plus two
+# extra digits so integer division lands directly on whole cents
+_PRICE_CENTS_SCALE = 10 ** (18 - 6 + 2)
+
+# Uniswap V2 ETH/USDC pool, checksummed once at import - to_checksum_address
+# recomputes a keccak per call, so it has no business in per-poll code
+POOL_ETH_USDC_V2 = Web3.to_checksum_address(
+    '0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc'
+)
+
+# Minimal ABI - just the getReserves function we need
+POOL_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"internalType": "uint112", "name": "_reserve0", "type": "uint112"},
+            {"internalType": "uint112", "name": "_reserve1", "type": "uint112"},
+            {"internalType": "uint32", "name": "_blockTimestampLast", "type": "uint32"}
+        ],
+        "payable": False,
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
 class PriceMonitor:
     def __init__(self):
-        # Connect to Ethereum via Alchemy
-        self.w3 = Web3(Web3.HTTPProvider(os.getenv('ALCHEMY_URL')))
-        
+        # Connect to Ethereum via Alchemy over one keep-alive session so
+        # every poll reuses the TLS connection
+        self.rpc_url = os.getenv('ALCHEMY_URL')
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2,
+                                                pool_maxsize=4)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        self.w3 = Web3(Web3.HTTPProvider(
+            self.rpc_url,
+            request_kwargs={'timeout': 10},
+            session=self._session
+        ))
+
         # Verify connection
         if not self.w3.is_connected():
             raise Exception("Failed to connect to Ethereum network")
         
         print("✅ Connected to Ethereum Mainnet")
         
-        # Uniswap V2 ETH/USDC Pool address
-        self.pool_address = '0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc'
-        
-        # Minimal ABI - just the getReserves function we need
-        self.pool_abi = [
-            {
-                "constant": True,
-                "inputs": [],
-                "name": "getReserves",
-                "outputs": [
-                    {"internalType": "uint112", "name": "_reserve0", "type": "uint112"},
-                    {"internalType": "uint112", "name": "_reserve1", "type": "uint112"},
-                    {"internalType": "uint32", "name": "_blockTimestampLast", "type": "uint32"}
-                ],
-                "payable": False,
-                "stateMutability": "view",
-                "type": "function"
-            }
-        ]
-        
+        # Pool address and ABI live at module level (checksummed once)
+        self.pool_address = POOL_ETH_USDC_V2
+        self.pool_abi = POOL_ABI
+
         # Create contract instance
         self.pool_contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(self.pool_address),
-            abi=self.pool_abi
+            address=POOL_ETH_USDC_V2,
+            abi=POOL_ABI
         )
-        
+
+        # Constant calldata: getReserves takes no arguments, so the call
+        # is just the selector - no ABI encoding needed per poll
+        self._reserves_call = {
+            'to': POOL_ETH_USDC_V2,
+            'data': GET_RESERVES_SELECTOR
+        }
+
+        # Last block seen and the price computed at it - reserves only
+        # move when a block lands, so between blocks we serve the cache
+        self._last_block = None
+        self._last_price = None
+
+    def _rpc_batch(self, calls):
+        """POST a JSON-RPC 2.0 batch in one HTTP round-trip
+
+        Args:
+            calls: List of (method, params) tuples
+
+        Returns:
+            Results ordered to match the calls (None for failed entries)
+        """
+        batch = [
+            {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(calls)
+        ]
+
+        response = self._session.post(self.rpc_url, json=batch, timeout=10)
+        response.raise_for_status()
+
+        results = [None] * len(batch)
+        for item in response.json():
+            results[item['id']] = item.get('result')
+        return results
+
     def get_eth_price(self):
         """Fetch current ETH/USDC price from Uniswap V2"""
         try:
-            # Get reserves from the pool
-            reserves = self.pool_contract.functions.getReserves().call()
-            
-            # reserve0 = USDC (6 decimals)
-            # reserve1 = WETH (18 decimals)
-            reserve_usdc = reserves[0] / 10**6
-            reserve_weth = reserves[1] / 10**18
-            
-            # Calculate price: USDC / WETH
-            eth_price = reserve_usdc / reserve_weth
-            
-            return {
-                'price': round(eth_price, 2),
-                'reserve_usdc': round(reserve_usdc, 2),
-                'reserve_weth': round(reserve_weth, 4),
-                'timestamp': datetime.now().strftime('%H:%M:%S'),
-                'dex': 'Uniswap V2'
-            }
-            
+            # One batched round-trip: block number + reserves call
+            block_hex, raw = self._rpc_batch([
+                ('eth_blockNumber', []),
+                ('eth_call', [self._reserves_call, 'latest'])
+            ])
+
+            # Reserves can only change when a new block lands; if the
+            # block hasn't moved, skip the decode and serve the cached
+            # price with a fresh timestamp
+            block = int(block_hex, 16)
+            if block == self._last_block and self._last_price is not None:
+                return {**self._last_price,
+                        'timestamp': datetime.now().strftime('%H:%M:%S')}
+
+            # Return data is three 32-byte words; slice the two reserves
+            # directly and skip _blockTimestampLast entirely
+            ret = bytes.fromhex(raw[2:])
+
+            price = self._price_from_reserves(int.from_bytes(ret[0:32], 'big'),
+                                              int.from_bytes(ret[32:64], 'big'))
+            self._last_block = block
+            self._last_price = price
+            return price
+
         except Exception as e:
             print(f" Error fetching price: {e}")
             return None
-    
+
+    def _price_from_reserves(self, r0, r1):
+        """Build the price dict from raw reserve integers"""
+        # Price in whole cents via exact integer math - one big-int
+        # divide, no float rounding error, same 2-decimal contract.
+        # Adding r1 // 2 before dividing rounds to the nearest cent
+        # like the old round(price, 2) did, instead of truncating
+        price_cents = (r0 * _PRICE_CENTS_SCALE + r1 // 2) // r1
+
+        # reserve0 = USDC (6 decimals), reserve1 = WETH (18 decimals)
+        reserve_usdc = r0 / 10**6
+        reserve_weth = r1 / 10**18
+
+        return {
+            'price': price_cents / 100,
+            'reserve_usdc': round(reserve_usdc, 2),
+            'reserve_weth': round(reserve_weth, 4),
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'dex': 'Uniswap V2'
+        }
+
+    @staticmethod
+    def _print_price(price_data):
+        """Print one price line"""
+        print(f"[{price_data['timestamp']}] "
+              f"ETH/USDC: ${price_data['price']:,.2f} "
+              f"| Pool: {price_data['reserve_usdc']:,.0f} USDC / "
+              f"{price_data['reserve_weth']:,.2f} WETH")
+
     def monitor_live(self, interval=5):
-        """Monitor price in real-time"""
+        """Monitor price in real-time
+
+        When ALCHEMY_WS_URL is configured, updates are driven by a
+        newHeads subscription - one reserves call per block, no idle
+        polls. Otherwise falls back to fixed-interval polling.
+        """
+        ws_url = os.getenv('ALCHEMY_WS_URL')
+
         print("\n PyBot - Live ETH Price Monitor")
         print("=" * 50)
         print(f"Monitoring Uniswap V2 ETH/USDC Pool")
-        print(f"Update interval: {interval} seconds")
+        if ws_url:
+            print("Update trigger: new blocks (WebSocket subscription)")
+        else:
+            print(f"Update interval: {interval} seconds")
         print("=" * 50)
         print("\nPress Ctrl+C to stop\n")
-        
+
         try:
+            if ws_url:
+                import asyncio
+                asyncio.run(self._monitor_blocks(ws_url))
+                return
+
+            # Bind the per-iteration lookups to locals once - LOAD_FAST
+            # in the loop instead of LOAD_GLOBAL/LOAD_ATTR per tick
+            fetch = self.get_eth_price
+            show = self._print_price
+            sleep = time.sleep
+
             while True:
-                price_data = self.get_eth_price()
-                
+                price_data = fetch()
+
                 if price_data:
-                    print(f"[{price_data['timestamp']}] "
-                          f"ETH/USDC: ${price_data['price']:,.2f} "
-                          f"| Pool: {price_data['reserve_usdc']:,.0f} USDC / "
-                          f"{price_data['reserve_weth']:,.2f} WETH")
-                
-                time.sleep(interval)
-                
+                    show(price_data)
+
+                sleep(interval)
+
         except KeyboardInterrupt:
             print("\n\n Monitoring stopped")
 
+    async def _monitor_blocks(self, ws_url):
+        """Print a price update for every new block over one WebSocket"""
+        from web3 import AsyncWeb3
+        from web3.providers import WebsocketProviderV2
+
+        async with AsyncWeb3.persistent_websocket(
+            WebsocketProviderV2(ws_url)
+        ) as w3:
+            await w3.eth.subscribe('newHeads')
+
+            async for _ in w3.ws.process_subscriptions():
+                raw = await w3.eth.call(self._reserves_call)
+                ret = bytes(raw)
+                price_data = self._price_from_reserves(
+                    int.from_bytes(ret[0:32], 'big'),
+                    int.from_bytes(ret[32:64], 'big')
+                )
+                self._print_price(price_data)
+
 # Test the monitor
 if __name__ == "__main__":
     monitor = PriceMonitor()
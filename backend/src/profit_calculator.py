@@ -3,6 +3,96 @@ PyBot - Profit Calculator
 Advanced profit calculations including gas fees, slippage, and MEV considerations
 """
 
+import os
+
+# DEX fees, hoisted to module level so hot loops pay one dict.get and
+# no instance attribute chain
+_DEX_FEES = {
+    'Uniswap V2': 0.003,     # 0.3%
+    'SushiSwap': 0.003,      # 0.3%
+}
+_get_fee = _DEX_FEES.get
+
+# Total gas cost per trade type (USD), pre-summed so the hot path is a
+# single dict.get instead of an if/elif chain over per-step costs
+_TRADE_COSTS = {
+    'standard': 30,      # swap x2 (buy + sell)
+    'flash_loan': 25,    # flash loan execution
+}
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is an acceleration-only dependency; fall back to plain Python
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+    prange = range
+
+@njit(cache=True)
+def _net_profit_kernel(buy_price, sell_price, amount,
+                       fee_buy, fee_sell, gas_cost, slip_rate):
+    """Pure-arithmetic core of the net profit calculation
+
+    Module-level scalar kernel so Numba can compile it once (cache=True
+    dodges the recompile tax across processes) and tight loops avoid all
+    attribute/dict machinery.
+    """
+    buy_cost = amount * buy_price
+    sell_revenue = amount * sell_price
+    gross_profit = sell_revenue - buy_cost
+
+    buy_fee = buy_cost * fee_buy
+    sell_fee = sell_revenue * fee_sell
+    total_fees = buy_fee + sell_fee
+
+    slip_cost = amount * (buy_price + sell_price) * slip_rate
+
+    net_profit = gross_profit - total_fees - gas_cost - slip_cost
+    total_cost = buy_cost + total_fees + gas_cost + slip_cost
+    roi_pct = (net_profit / total_cost) * 100 if total_cost > 0 else 0.0
+
+    return (buy_cost, sell_revenue, gross_profit, buy_fee, sell_fee,
+            slip_cost, net_profit, roi_pct)
+
+@njit(parallel=True, cache=True)
+def _profit_sweep_kernel(sizes, buy_price, sell_price,
+                         fee_buy, fee_sell, slip_rate, gas_cost):
+    """Net profit across a grid of trade sizes, one prange lane per size
+
+    parallel=True fans the grid across cores; each lane is a handful of
+    fused multiply-adds, so the sweep is memory-bound and scales with
+    core count.
+    """
+    net = np.empty(sizes.shape[0], dtype=np.float64)
+    margin = (sell_price - buy_price
+              - buy_price * fee_buy
+              - sell_price * fee_sell
+              - (buy_price + sell_price) * slip_rate)
+    for i in prange(sizes.shape[0]):
+        net[i] = sizes[i] * margin - gas_cost
+    return net
+
+# Keep un-rebound references to the @njit definitions; build_kernels.py
+# needs their .py_func even when an AOT build is already installed
+_net_profit_jit = _net_profit_kernel
+_profit_sweep_jit = _profit_sweep_kernel
+
+# Prefer the ahead-of-time build when it exists (see build_kernels.py):
+# same kernels, compiled at deploy time, zero first-call JIT warm-up.
+# PYBOT_DISABLE_AOT_KERNELS=1 forces the JIT versions (used by the
+# builder itself so a rebuild never imports its own previous output).
+if os.getenv('PYBOT_DISABLE_AOT_KERNELS') != '1':
+    try:
+        import profit_kernels as _aot
+        _net_profit_kernel = _aot.net_profit
+        _profit_sweep_kernel = _aot.profit_sweep
+    except ImportError:
+        pass
+
 class ProfitCalculator:
     def __init__(self):
         # Gas cost estimates (in USD)
@@ -14,72 +104,70 @@ class ProfitCalculator:
         
         # Default slippage tolerance
         self.default_slippage = 0.005  # 0.5%
-        
-        # DEX fees
-        self.dex_fees = {
-            'Uniswap V2': 0.003,     # 0.3%
-            'SushiSwap': 0.003,      # 0.3%
-        }
-        
+
+        # DEX fees (shared module-level table)
+        self.dex_fees = _DEX_FEES
+
         print("✅ ProfitCalculator initialized")
     
     def calculate_trade_cost(self, trade_type='standard'):
         """Calculate total gas cost for a trade"""
-        if trade_type == 'standard':
-            return self.gas_costs['swap'] * 2  # Buy + Sell
-        elif trade_type == 'flash_loan':
-            return self.gas_costs['flash_loan']
-        else:
-            return self.gas_costs['swap']
+        return _TRADE_COSTS.get(trade_type, self.gas_costs['swap'])
     
     def calculate_slippage_impact(self, amount, price, slippage=None):
-        """Calculate potential slippage impact"""
+        """Calculate potential slippage impact
+
+        Back-compat helper for one-off estimates. The profit path does
+        not call this: _net_profit_kernel fuses the slippage term into
+        the same arithmetic pass as fees and gas, so there is no extra
+        method call or intermediate product per evaluation.
+        """
         if slippage is None:
             slippage = self.default_slippage
-        
-        slippage_loss = amount * price * slippage
-        return slippage_loss
+        return amount * price * slippage
     
     def calculate_dex_fee(self, trade_value, dex_name):
         """Calculate DEX trading fee"""
-        fee_rate = self.dex_fees.get(dex_name, 0.003)
+        fee_rate = _get_fee(dex_name, 0.003)
         return trade_value * fee_rate
-    
-    def calculate_net_profit(self, buy_price, sell_price, trade_amount_eth, 
+
+    def _calculate_raw(self, buy_price, sell_price, trade_amount_eth,
+                       buy_dex, sell_dex, include_slippage=True):
+        """Run the profit kernel and return unrounded floats
+
+        Hot loops should call this directly; rounding is a presentation
+        concern handled by calculate_net_profit at the API boundary.
+
+        Returns:
+            (buy_cost, sell_revenue, gross_profit, buy_fee, sell_fee,
+             slippage_cost, net_profit, roi_pct, gas_cost)
+        """
+        fee_buy = _get_fee(buy_dex, 0.003)
+        fee_sell = _get_fee(sell_dex, 0.003)
+        gas_cost = self.calculate_trade_cost('standard')
+        slip_rate = self.default_slippage if include_slippage else 0.0
+
+        return _net_profit_kernel(
+            buy_price, sell_price, trade_amount_eth,
+            fee_buy, fee_sell, float(gas_cost), slip_rate
+        ) + (gas_cost,)
+
+    def calculate_net_profit(self, buy_price, sell_price, trade_amount_eth,
                             buy_dex, sell_dex, include_slippage=True):
         """
         Calculate comprehensive net profit
-        
+
         Returns:
-            Dictionary with detailed breakdown
+            Dictionary with detailed breakdown (values rounded for display)
         """
-        # Gross calculation
-        buy_cost = trade_amount_eth * buy_price
-        sell_revenue = trade_amount_eth * sell_price
-        gross_profit = sell_revenue - buy_cost
-        
-        # Fee calculations
-        buy_fee = self.calculate_dex_fee(buy_cost, buy_dex)
-        sell_fee = self.calculate_dex_fee(sell_revenue, sell_dex)
+        (buy_cost, sell_revenue, gross_profit, buy_fee, sell_fee,
+         slippage_cost, net_profit, roi_pct, gas_cost) = self._calculate_raw(
+            buy_price, sell_price, trade_amount_eth,
+            buy_dex, sell_dex, include_slippage
+        )
+
         total_dex_fees = buy_fee + sell_fee
-        
-        # Gas costs
-        gas_cost = self.calculate_trade_cost('standard')
-        
-        # Slippage
-        slippage_cost = 0
-        if include_slippage:
-            buy_slippage = self.calculate_slippage_impact(trade_amount_eth, buy_price)
-            sell_slippage = self.calculate_slippage_impact(trade_amount_eth, sell_price)
-            slippage_cost = buy_slippage + sell_slippage
-        
-        # Net profit
-        net_profit = gross_profit - total_dex_fees - gas_cost - slippage_cost
-        
-        # ROI calculations
-        total_cost = buy_cost + total_dex_fees + gas_cost + slippage_cost
-        roi_pct = (net_profit / total_cost) * 100 if total_cost > 0 else 0
-        
+
         return {
             'trade_amount_eth': trade_amount_eth,
             'buy_price': buy_price,
@@ -99,29 +187,57 @@ class ProfitCalculator:
     
     def find_optimal_trade_size(self, buy_price, sell_price, buy_dex, sell_dex,
                                 max_eth=10, step=0.1):
-        """Find the optimal trade size for maximum profit"""
-        best_profit = -float('inf')
-        best_size = 0
-        
-        trade_sizes = []
-        current = step
-        while current <= max_eth:
-            trade_sizes.append(current)
-            current += step
-        
-        for size in trade_sizes:
-            calc = self.calculate_net_profit(
-                buy_price, sell_price, size, buy_dex, sell_dex
-            )
-            
-            if calc['net_profit'] > best_profit:
-                best_profit = calc['net_profit']
-                best_size = size
-        
+        """Find the optimal trade size for maximum profit
+
+        Net profit is affine in trade size - a per-ETH margin minus fixed
+        gas - so the optimum is closed-form: trade the maximum when the
+        margin is positive, the minimum step when it isn't. No need to
+        sweep the grid calling calculate_net_profit per size.
+        """
+        fee_buy = _get_fee(buy_dex, 0.003)
+        fee_sell = _get_fee(sell_dex, 0.003)
+        gas_cost = self.calculate_trade_cost('standard')
+
+        # Per-ETH margin: spread minus both DEX fees and slippage
+        per_eth = ((sell_price - buy_price)
+                   - buy_price * fee_buy
+                   - sell_price * fee_sell
+                   - (buy_price + sell_price) * self.default_slippage)
+
+        best_size = max_eth if per_eth > 0 else step
+        best_profit = best_size * per_eth - gas_cost
+
         return {
             'optimal_size': best_size,
-            'max_profit': best_profit,
-            'tested_sizes': len(trade_sizes)
+            'max_profit': round(best_profit, 2),
+            'tested_sizes': int(max_eth / step)
+        }
+
+    def sweep_trade_sizes(self, buy_price, sell_price, buy_dex, sell_dex,
+                          sizes):
+        """Evaluate net profit over an arbitrary grid of trade sizes
+
+        Backtesting helper for non-uniform grids where the closed form
+        in find_optimal_trade_size doesn't apply directly. The grid runs
+        through the parallel Numba kernel; argmax happens outside it.
+
+        Returns:
+            Dict with the best size, its profit, and the full net array
+        """
+        sizes = np.ascontiguousarray(sizes, dtype=np.float64)
+
+        net = _profit_sweep_kernel(
+            sizes, buy_price, sell_price,
+            _get_fee(buy_dex, 0.003), _get_fee(sell_dex, 0.003),
+            self.default_slippage, float(self.calculate_trade_cost('standard'))
+        )
+
+        best_i = int(np.argmax(net))
+        return {
+            'optimal_size': float(sizes[best_i]),
+            'max_profit': round(float(net[best_i]), 2),
+            'tested_sizes': int(sizes.shape[0]),
+            'net_profits': net
         }
 
 if __name__ == "__main__":
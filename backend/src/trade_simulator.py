@@ -5,16 +5,93 @@ Simulates trade execution and tracks performance
 
 from datetime import datetime
 from profit_calculator import ProfitCalculator
-import json
+import gzip
+import numpy as np
+import orjson
+import os
+import sys
+import time
+
+_BAR = "=" * 70
+
+# Pre-built %-templates so each report is one formatted string and one
+# stdout write instead of ~15 buffered print calls
+_TRADE_RESULT_TMPL = (
+    "\n" + _BAR + "\n"
+    "TRADE SIMULATION: %s\n" + _BAR + "\n"
+    "Status: %s\n"
+    "Time: %s\n"
+    "\n"
+    "Buy from %-12s @ $%s\n"
+    "Sell on %-12s @ $%s\n"
+    "Trade Size: %s ETH\n"
+    "\n"
+    "Profit Breakdown:\n"
+    "  Gross Profit:    $%10s\n"
+    "  DEX Fees:       -$%10s\n"
+    "  Gas Cost:       -$%10s\n"
+    "  Slippage:       -$%10s\n"
+    "  " + "─" * 30 + "\n"
+    "  NET PROFIT:      $%10s (%s%% ROI)\n" + _BAR + "\n"
+)
+
+_STATS_TMPL = (
+    "\n" + _BAR + "\n"
+    "TRADING STATISTICS\n" + _BAR + "\n"
+    "Total Trades:      %s\n"
+    "Successful:        %s (%s%%)\n"
+    "Failed:            %s\n"
+    "Total Profit:      $%s\n"
+    "Avg Profit/Trade:  $%s\n"
+)
+
+_STATS_BEST_TMPL = "\nBest Trade:        %s\n  Profit: $%s\n"
+_STATS_WORST_TMPL = "\nWorst Trade:       %s\n  Profit: $%s\n"
+
+# Columnar trade record - one fixed-width row per simulated trade
+_TRADE_DTYPE = np.dtype([
+    ('id', 'i8'),           # canonical trade number (TRADE_<id>)
+    ('ts', 'i8'),           # epoch nanoseconds
+    ('buy_price', 'f8'),
+    ('sell_price', 'f8'),
+    ('size', 'f8'),
+    ('net_profit', 'f8'),
+    ('ok', '?'),
+])
+
+def _iso(ts_ns):
+    """Format an epoch-nanosecond timestamp for display"""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat()
 
 class TradeSimulator:
-    def __init__(self):
+    # Ring buffer capacity; oldest rows are overwritten past this
+    HISTORY_CAPACITY = 10_000
+
+    def __init__(self, history_path='../data/trade_history.ndjson'):
         self.profit_calc = ProfitCalculator()
-        self.trade_history = []
         self.total_profit = 0
         self.total_trades = 0
         self.successful_trades = 0
-        
+
+        # Pre-allocated structured ring buffer instead of a growing list
+        # of dicts - one contiguous block, no per-trade allocation
+        self._buf = np.empty(self.HISTORY_CAPACITY, dtype=_TRADE_DTYPE)
+        self._n = 0
+
+        # Durable history is streamed as append-only NDJSON: one
+        # orjson line per trade into a 1 MiB-buffered file, so nothing
+        # is ever re-serialized and a crash loses at most one buffer
+        hist_dir = os.path.dirname(history_path)
+        if hist_dir and not os.path.exists(hist_dir):
+            os.makedirs(hist_dir)
+        self._hist_fp = open(history_path, 'ab', buffering=1 << 20)
+
+        # Best/worst across batch simulations, tracked incrementally
+        self._best_net = -float('inf')
+        self._best_rec = None
+        self._worst_net = float('inf')
+        self._worst_rec = None
+
         print("TradeSimulator initialized")
     
     def simulate_trade(self, arbitrage_opportunity):
@@ -47,10 +124,15 @@ class TradeSimulator:
         # Determine if trade would be successful
         is_successful = profit_breakdown['net_profit'] > 0
         
-        # Create trade record
+        # Create trade record; timestamp stays a raw time_ns() int on the
+        # hot path - strftime/isoformat only happens at print/API time.
+        # total_trades is the one canonical id counter (batches bump it
+        # too), so the number is taken here and stored with the row
+        ts = time.time_ns()
+        trade_no = self.total_trades + 1
         trade_record = {
-            'timestamp': datetime.now().isoformat(),
-            'trade_id': f"TRADE_{self.total_trades + 1}",
+            'timestamp': ts,
+            'trade_id': f"TRADE_{trade_no}",
             'buy_dex': buy_dex,
             'sell_dex': sell_dex,
             'buy_price': buy_price,
@@ -61,16 +143,122 @@ class TradeSimulator:
             'status': 'SUCCESS' if is_successful else 'FAILED'
         }
         
-        # Update statistics
-        self.trade_history.append(trade_record)
+        # Update statistics - write one row into the ring buffer
+        row = self._buf[self._n % self.HISTORY_CAPACITY]
+        row['id'] = trade_no
+        row['ts'] = ts
+        row['buy_price'] = buy_price
+        row['sell_price'] = sell_price
+        row['size'] = trade_amount
+        row['net_profit'] = profit_breakdown['net_profit']
+        row['ok'] = is_successful
+        self._n += 1
         self.total_trades += 1
-        
+
+        # Stream the full record to the NDJSON log (buffered append)
+        self._hist_fp.write(orjson.dumps(trade_record) + b'\n')
+
         if is_successful:
             self.successful_trades += 1
             self.total_profit += profit_breakdown['net_profit']
-        
+
+        # Incremental best/worst tracking - O(1) per trade instead of a
+        # full history scan in get_statistics
+        net = profit_breakdown['net_profit']
+        if net > self._best_net:
+            self._best_net = net
+            self._best_rec = {
+                'trade_id': trade_record['trade_id'],
+                'timestamp': trade_record['timestamp'],
+                'net_profit': net,
+                'trade_amount': trade_amount
+            }
+        if net < self._worst_net:
+            self._worst_net = net
+            self._worst_rec = {
+                'trade_id': trade_record['trade_id'],
+                'timestamp': trade_record['timestamp'],
+                'net_profit': net,
+                'trade_amount': trade_amount
+            }
+
         return trade_record
     
+    def simulate_batch(self, buy_prices, sell_prices, sizes,
+                       buy_dex='SushiSwap', sell_dex='Uniswap V2'):
+        """
+        Simulate many trades in one vectorized pass
+
+        Columnar (SoA) variant of simulate_trade for backtests: the whole
+        batch is evaluated with NumPy array ops instead of building one
+        record dict per trade.
+
+        Args:
+            buy_prices: Array of buy prices (USD)
+            sell_prices: Array of sell prices (USD)
+            sizes: Array of trade sizes (ETH)
+            buy_dex: DEX bought on (fee lookup)
+            sell_dex: DEX sold on (fee lookup)
+
+        Returns:
+            Batch summary dict
+        """
+        buy_prices = np.asarray(buy_prices, dtype=np.float64)
+        sell_prices = np.asarray(sell_prices, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+
+        calc = self.profit_calc
+        fee_buy = calc.dex_fees.get(buy_dex, 0.003)
+        fee_sell = calc.dex_fees.get(sell_dex, 0.003)
+        gas_cost = calc.calculate_trade_cost('standard')
+        slip_rate = calc.default_slippage
+
+        gross = sizes * (sell_prices - buy_prices)
+        fees = sizes * (buy_prices * fee_buy + sell_prices * fee_sell)
+        slippage = sizes * (buy_prices + sell_prices) * slip_rate
+        net = gross - fees - gas_cost - slippage
+
+        successful = net > 0
+        count = int(sizes.shape[0])
+        first_id = self.total_trades + 1
+
+        # Aggregate statistics update in O(1) per batch
+        self.total_trades += count
+        self.successful_trades += int(successful.sum())
+        self.total_profit += float(net[successful].sum())
+
+        # Incremental best/worst tracking (no history scan)
+        timestamp = time.time_ns()
+        best_i = int(np.argmax(net))
+        worst_i = int(np.argmin(net))
+
+        if net[best_i] > self._best_net:
+            self._best_net = float(net[best_i])
+            self._best_rec = {
+                'trade_id': f"TRADE_{first_id + best_i}",
+                'timestamp': timestamp,
+                'net_profit': round(float(net[best_i]), 2),
+                'trade_amount': float(sizes[best_i])
+            }
+
+        if net[worst_i] < self._worst_net:
+            self._worst_net = float(net[worst_i])
+            self._worst_rec = {
+                'trade_id': f"TRADE_{first_id + worst_i}",
+                'timestamp': timestamp,
+                'net_profit': round(float(net[worst_i]), 2),
+                'trade_amount': float(sizes[worst_i])
+            }
+
+        return {
+            'count': count,
+            'successful': int(successful.sum()),
+            'failed': count - int(successful.sum()),
+            'total_net_profit': round(float(net.sum()), 2),
+            'best_net_profit': round(float(net[best_i]), 2),
+            'worst_net_profit': round(float(net[worst_i]), 2)
+        }
+
     def get_statistics(self):
         """Get trading statistics"""
         if self.total_trades == 0:
@@ -90,92 +278,120 @@ class TradeSimulator:
             'success_rate': round((self.successful_trades / self.total_trades) * 100, 2),
             'total_profit': round(self.total_profit, 2),
             'avg_profit_per_trade': round(self.total_profit / self.successful_trades if self.successful_trades > 0 else 0, 2),
-            'best_trade': self._get_best_trade(),
-            'worst_trade': self._get_worst_trade()
+            'best_trade': self._format_trade(self._get_best_trade()),
+            'worst_trade': self._format_trade(self._get_worst_trade())
         }
-    
-    def _get_best_trade(self):
-        """Find the most profitable trade"""
-        if not self.trade_history:
+
+    @staticmethod
+    def _format_trade(rec):
+        """Render a cached best/worst record for display (ISO timestamp)"""
+        if rec is None:
             return None
-        
-        best = max(self.trade_history, 
-                   key=lambda x: x['profit_breakdown']['net_profit'])
-        return {
-            'trade_id': best['trade_id'],
-            'timestamp': best['timestamp'],
-            'net_profit': best['profit_breakdown']['net_profit'],
-            'trade_amount': best['trade_amount_eth']
-        }
+        return {**rec, 'timestamp': _iso(rec['timestamp'])}
     
+    def _get_best_trade(self):
+        """Return the most profitable trade seen so far"""
+        return self._best_rec
+
     def _get_worst_trade(self):
-        """Find the least profitable trade"""
-        if not self.trade_history:
-            return None
-        
-        worst = min(self.trade_history,
-                    key=lambda x: x['profit_breakdown']['net_profit'])
-        return {
-            'trade_id': worst['trade_id'],
-            'timestamp': worst['timestamp'],
-            'net_profit': worst['profit_breakdown']['net_profit'],
-            'trade_amount': worst['trade_amount_eth']
-        }
+        """Return the least profitable trade seen so far"""
+        return self._worst_rec
     
+    def _materialize(self, count):
+        """Build record dicts for the last `count` buffered trades
+
+        Dicts are created lazily here, only for the rows a caller
+        actually asks for - the hot path stores nothing but fixed-width
+        struct rows.
+        """
+        count = min(count, self._n, self.HISTORY_CAPACITY)
+        records = []
+        for i in range(self._n - count, self._n):
+            row = self._buf[i % self.HISTORY_CAPACITY]
+            records.append({
+                'trade_id': f"TRADE_{int(row['id'])}",
+                'timestamp': datetime.fromtimestamp(
+                    row['ts'] / 1e9).isoformat(),
+                'buy_price': float(row['buy_price']),
+                'sell_price': float(row['sell_price']),
+                'trade_amount_eth': float(row['size']),
+                'net_profit': round(float(row['net_profit']), 2),
+                'is_successful': bool(row['ok']),
+                'status': 'SUCCESS' if row['ok'] else 'FAILED'
+            })
+        return records
+
     def get_recent_trades(self, limit=10):
         """Get most recent trades"""
-        return self.trade_history[-limit:] if self.trade_history else []
+        return self._materialize(limit)
     
     def print_trade_result(self, trade_record):
-        """Pretty print a trade result"""
-        print("\n" + "=" * 70)
-        print(f"TRADE SIMULATION: {trade_record['trade_id']}")
-        print("=" * 70)
-        print(f"Status: {trade_record['status']}")
-        print(f"Time: {trade_record['timestamp']}")
-        print()
-        print(f"Buy from {trade_record['buy_dex']:12} @ ${trade_record['buy_price']:,.2f}")
-        print(f"Sell on {trade_record['sell_dex']:12} @ ${trade_record['sell_price']:,.2f}")
-        print(f"Trade Size: {trade_record['trade_amount_eth']} ETH")
-        print()
-        
+        """Pretty print a trade result (single stdout write)"""
         breakdown = trade_record['profit_breakdown']
-        print("Profit Breakdown:")
-        print(f"  Gross Profit:    ${breakdown['gross_profit']:>10}")
-        print(f"  DEX Fees:       -${breakdown['total_dex_fees']:>10}")
-        print(f"  Gas Cost:       -${breakdown['gas_cost']:>10}")
-        print(f"  Slippage:       -${breakdown['slippage_cost']:>10}")
-        print(f"  {'─' * 30}")
-        print(f"  NET PROFIT:      ${breakdown['net_profit']:>10} ({breakdown['roi_pct']}% ROI)")
-        print("=" * 70)
-    
+        sys.stdout.write(_TRADE_RESULT_TMPL % (
+            trade_record['trade_id'],
+            trade_record['status'],
+            _iso(trade_record['timestamp']),
+            trade_record['buy_dex'], f"{trade_record['buy_price']:,.2f}",
+            trade_record['sell_dex'], f"{trade_record['sell_price']:,.2f}",
+            trade_record['trade_amount_eth'],
+            breakdown['gross_profit'],
+            breakdown['total_dex_fees'],
+            breakdown['gas_cost'],
+            breakdown['slippage_cost'],
+            breakdown['net_profit'],
+            breakdown['roi_pct']
+        ))
+
     def print_statistics(self):
-        """Pretty print trading statistics"""
+        """Pretty print trading statistics (single stdout write)"""
         stats = self.get_statistics()
-        
-        print("\n" + "=" * 70)
-        print("TRADING STATISTICS")
-        print("=" * 70)
-        print(f"Total Trades:      {stats['total_trades']}")
-        print(f"Successful:        {stats['successful_trades']} ({stats['success_rate']}%)")
-        print(f"Failed:            {stats['failed_trades']}")
-        print(f"Total Profit:      ${stats['total_profit']}")
-        print(f"Avg Profit/Trade:  ${stats['avg_profit_per_trade']}")
-        
+
+        out = _STATS_TMPL % (
+            stats['total_trades'],
+            stats['successful_trades'], stats['success_rate'],
+            stats['failed_trades'],
+            stats['total_profit'],
+            stats['avg_profit_per_trade']
+        )
+
         if stats['best_trade']:
-            print(f"\nBest Trade:        {stats['best_trade']['trade_id']}")
-            print(f"  Profit: ${stats['best_trade']['net_profit']}")
-        
+            out += _STATS_BEST_TMPL % (stats['best_trade']['trade_id'],
+                                       stats['best_trade']['net_profit'])
+
         if stats['worst_trade']:
-            print(f"\nWorst Trade:       {stats['worst_trade']['trade_id']}")
-            print(f"  Profit: ${stats['worst_trade']['net_profit']}")
-        
-        print("=" * 70)
+            out += _STATS_WORST_TMPL % (stats['worst_trade']['trade_id'],
+                                        stats['worst_trade']['net_profit'])
+
+        sys.stdout.write(out + _BAR + "\n")
     
-    def export_history(self, filepath='../data/trade_history.json'):
-        """Export trade history to JSON"""
-        with open(filepath, 'w') as f:
-            json.dump(self.trade_history, f, indent=2)
+    def export_history(self, filepath='../data/trade_history.json',
+                       pretty=False):
+        """Export buffered trade history as one JSON document
+
+        Compat helper - the authoritative full log is the NDJSON stream
+        written per trade; this repacks the in-memory ring buffer for
+        consumers that want a single JSON array. The default output is
+        compact JSON gzipped to `<filepath>.gz`; pass pretty=True for
+        the old uncompressed indented file.
+        """
+        self._hist_fp.flush()
+        records = self._materialize(self.HISTORY_CAPACITY)
+
+        # orjson serializes straight to bytes (and handles NumPy scalars),
+        # so write binary and skip the str encode round-trip
+        if pretty:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(
+                    records,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                ))
+        else:
+            filepath += '.gz'
+            with gzip.open(filepath, 'wb') as f:
+                f.write(orjson.dumps(
+                    records, option=orjson.OPT_SERIALIZE_NUMPY
+                ))
         print(f"Trade history exported to {filepath}")
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+"""
+PyBot - Shared Utilities
+Small helpers used across backend components
+"""
+
+import threading
+import time
+from functools import wraps
+
+def ttl_cache(seconds=1.5):
+    """
+    Cache a function's result for a short TTL with single-flight refresh
+
+    While the cached value is fresh, callers get it without touching the
+    network. When it expires, only one caller re-runs the function; any
+    concurrent callers block on the lock and reuse the refreshed result
+    instead of issuing duplicate RPCs.
+
+    Args:
+        seconds: How long a result stays fresh
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        state = {'expires': 0.0, 'value': None}
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if time.monotonic() < state['expires']:
+                return state['value']
+
+            with lock:
+                # Another caller may have refreshed while we waited
+                if time.monotonic() < state['expires']:
+                    return state['value']
+
+                value = func(*args, **kwargs)
+                state['value'] = value
+                state['expires'] = time.monotonic() + seconds
+                return value
+
+        return wrapper
+    return decorator
@@ -0,0 +1,13 @@
+"""
+PyBot - WSGI Entry Point
+Production entry for gunicorn:
+
+    gunicorn -k eventlet -w $(nproc) --worker-connections 2000 wsgi:application
+
+With more than one worker, set REDIS_URL so cross-worker WebSocket
+emits go through a shared message queue.
+"""
+
+from api_server import app, socketio  # noqa: F401
+
+application = app